@@ -4,28 +4,102 @@ Self-Storage Facility Scanner - Fixed Single-Window Version
 Includes multiple mapping options and better iframe integration
 """
 
-from flask import Flask, render_template, request, jsonify, session
-import json
-import math
+from flask import Flask, Response, render_template, request, jsonify, session, stream_with_context
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 import time
-from typing import List, Tuple, Dict
-import uuid
+import functools
+import hashlib
+import math
+from typing import Callable, List, Optional, Tuple, Dict
+import secrets
+import threading
 from datetime import datetime
 import os
 
+import numpy as np
+import orjson
+
+
+class OrjsonProvider(JSONProvider):
+    """Encode and decode JSON with orjson instead of the stdlib json module"""
+    
+    option = orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(self, obj, **kwargs) -> str:
+        # Formatting arguments such as separators are ignored; output is always compact
+        return orjson.dumps(obj, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        # request.get_json() hands over the raw body bytes, which orjson
+        # parses directly without decoding them to str first
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """Build the response from orjson's bytes without a round trip through str"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option),
+                                        mimetype='application/json')
+
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'storage-scanner-secret-key-2024')
+app.json = OrjsonProvider(app)
+
+# Compress the page and JSON over 512 bytes (status, bookmark lists, exports),
+# preferring Brotli. text/event-stream stays out: Flask-Compress doesn't
+# flush per chunk, so events would sit in the compressor until it filled.
+app.config.update(
+    COMPRESS_ALGORITHM=['br', 'gzip'],
+    COMPRESS_BR_LEVEL=4,
+    COMPRESS_LEVEL=5,
+    COMPRESS_MIN_SIZE=512,
+    COMPRESS_MIMETYPES=['text/html', 'application/json'],
+)
+Compress(app)
+
+
+@app.after_request
+def set_static_cache_headers(response):
+    """Let static assets be cached for good; JSON endpoints set their own policy"""
+    if request.endpoint == 'static':
+        # Assets must be renamed when they change for this to be safe
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+# Per-point map links, filled in with %-formatting for every grid point
+GOOGLE_MAPS_URL = 'https://maps.google.com/@%s,%s,%dz'
+OPENSTREETMAP_URL = 'https://www.openstreetmap.org/?mlat=%s&mlon=%s&zoom=%d'
+BING_MAPS_URL = 'https://www.bing.com/maps?cp=%s~%s&lvl=%d'
+STREET_VIEW_URL = 'https://maps.google.com/@%s,%s,3a,75y,0h,90t/data=!3m7!1e1'
+GOOGLE_SATELLITE_URL = 'https://www.google.com/maps/@%s,%s,19z/data=!3m1!1e3'
+BING_SATELLITE_URL = 'https://www.bing.com/maps?cp=%s~%s&lvl=19&style=a'
+OSM_EMBED_URL = 'https://www.openstreetmap.org/export/embed.html?bbox=%s,%s,%s,%s&layer=mapnik&marker=%s,%s'
+OSM_EMBED_SPAN = 0.001  # Degrees shown either side of the point in the OSM frame
+
+# The Google embed link only varies by coordinates, so it is sent to the
+# client once per scan with {lat}/{lon} placeholders instead of per point
+GOOGLE_EMBED_URL_TEMPLATE = ('https://www.google.com/maps/embed?pb=!1m14!1m12!1m3!1d3000!2d{lon}!3d{lat}'
+                             '!2m3!1f0!2f0!3f0!3m2!1i1024!2i768!4f13.1!5e0!3m2!1sen!2sus!4v1')
+
+# Scan grids are kept as parallel typed arrays, one per column
+GRID_DTYPES = {
+    'lat': np.dtype('<f8'),
+    'lon': np.dtype('<f8'),
+    'distance': np.dtype('<f4'),
+    'row': np.dtype('<i4'),
+    'col': np.dtype('<i4'),
+}
 
-# In-memory storage for scanning sessions
-scanning_sessions = {}
 
 class GridCalculator:
     """Calculate systematic grid coverage for the scanning area"""
     
     @staticmethod
     def calculate_scan_grid(center_lat: float, center_lon: float, 
-                          radius_miles: float, zoom_level: int) -> List[Dict]:
-        """Calculate grid points with metadata for web display"""
+                          radius_miles: float, zoom_level: int) -> Dict[str, np.ndarray]:
+        """Calculate grid points as parallel arrays keyed like GRID_DTYPES"""
         
         # Viewport sizes at different zoom levels (approximate)
         viewport_degrees = {
@@ -43,56 +117,399 @@ class GridCalculator:
         step_size = view_size * 0.8
         grid_size = int(2 * radius_deg / step_size) + 1
         
-        grid_points = []
-        point_id = 0
-        
-        for row in range(grid_size):
-            lat = center_lat - radius_deg + (row * step_size)
-            
-            # Alternate scanning direction for efficiency (like reading a book)
-            cols = range(grid_size) if row % 2 == 0 else range(grid_size - 1, -1, -1)
-            
-            for col in cols:
-                lon = center_lon - radius_deg + (col * step_size)
-                
-                # Only include points within the circular radius
-                distance = GridCalculator._distance_miles(center_lat, center_lon, lat, lon)
-                if distance <= radius_miles:
-                    grid_points.append({
-                        'id': point_id,
-                        'lat': round(lat, 6),
-                        'lon': round(lon, 6),
-                        'row': row,
-                        'col': col,
-                        'distance_from_center': round(distance, 2),
-                        'google_maps_url': f"https://maps.google.com/@{lat},{lon},{zoom_level}z",
-                        'google_embed_url': f"https://www.google.com/maps/embed?pb=!1m14!1m12!1m3!1d3000!2d{lon}!3d{lat}!2m3!1f0!2f0!3f0!3m2!1i1024!2i768!4f13.1!5e0!3m2!1sen!2sus!4v1",
-                        'openstreetmap_url': f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom={zoom_level}",
-                        'bing_maps_url': f"https://www.bing.com/maps?cp={lat}~{lon}&lvl={zoom_level}"
-                    })
-                    point_id += 1
-        
-        return grid_points
+        # Which cells fall inside the circle depends only on the grid's shape,
+        # so the cell offsets are shared by every scan with the same geometry
+        rows, cols = GridCalculator._radius_offsets(
+            grid_size, round(radius_deg / step_size, 6),
+            round(math.cos(math.radians(center_lat)), 4)
+        )
+        lats = center_lat - radius_deg + rows * step_size
+        lons = center_lon - radius_deg + cols * step_size
+        distance_miles = GridCalculator._make_distance_fn(center_lat, center_lon)
+        distances = distance_miles(lats, lons)
+        
+        return {
+            'lat': np.round(lats, 6),
+            'lon': np.round(lons, 6),
+            'distance': distances.astype(GRID_DTYPES['distance']),
+            'row': rows,
+            'col': cols,
+        }
     
     @staticmethod
-    def _distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate distance between coordinates in miles using Haversine formula"""
-        R = 3959  # Earth's radius in miles
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlon/2) * math.sin(dlon/2))
+    @functools.lru_cache(maxsize=16)
+    def _radius_offsets(grid_size: int, radius_cells: float,
+                        cos_lat: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Row and column of every in-radius cell, in scanning order
+        
+        radius_cells is the scan radius measured in grid steps and cos_lat
+        the longitude scale at the scan center. The returned arrays are cached
+        and shared, so they are marked read-only.
+        """
+        # Compare squared distances so no square root is taken, and broadcast
+        # a column of squared row offsets against a row of squared column
+        # offsets, so the boolean mask is the only full-size array
+        steps = np.arange(grid_size) - radius_cells
+        dy2 = steps ** 2
+        dx2 = (steps * cos_lat) ** 2
+        inside = dy2[:, np.newaxis] + dx2[np.newaxis, :] <= radius_cells ** 2
+        
+        # Alternate scanning direction for efficiency (like reading a book)
+        inside[1::2] = inside[1::2, ::-1]
+        
+        # Only include points within the circular radius
+        rows, cols = np.nonzero(inside)
+        odd = rows % 2 == 1
+        cols[odd] = grid_size - 1 - cols[odd]
+        
+        rows = rows.astype(GRID_DTYPES['row'])
+        cols = cols.astype(GRID_DTYPES['col'])
+        rows.flags.writeable = False
+        cols.flags.writeable = False
+        return rows, cols
+    
+    @staticmethod
+    def grid_point(index: int, record: Dict, zoom_level: int) -> Dict:
+        """Expand one grid record into the point metadata shown by the web UI"""
+        lat = float(record['lat'])
+        lon = float(record['lon'])
+        lat_s = format(lat, '.6f')
+        lon_s = format(lon, '.6f')
+        bbox = (format(lon - OSM_EMBED_SPAN, '.6f'), format(lat - OSM_EMBED_SPAN, '.6f'),
+                format(lon + OSM_EMBED_SPAN, '.6f'), format(lat + OSM_EMBED_SPAN, '.6f'))
+        return {
+            'id': index,
+            'lat': lat,
+            'lon': lon,
+            'row': int(record['row']),
+            'col': int(record['col']),
+            'distance_from_center': round(float(record['distance']), 2),
+            'google_maps_url': GOOGLE_MAPS_URL % (lat_s, lon_s, zoom_level),
+            'openstreetmap_url': OPENSTREETMAP_URL % (lat_s, lon_s, zoom_level),
+            'bing_maps_url': BING_MAPS_URL % (lat_s, lon_s, zoom_level),
+            'street_view_url': STREET_VIEW_URL % (lat_s, lon_s),
+            'google_satellite_url': GOOGLE_SATELLITE_URL % (lat_s, lon_s),
+            'bing_satellite_url': BING_SATELLITE_URL % (lat_s, lon_s),
+            'osm_embed_url': OSM_EMBED_URL % (bbox + (lat_s, lon_s))
+        }
+    
+    @staticmethod
+    def _make_distance_fn(center_lat: float, center_lon: float) -> Callable:
+        """Return distance_miles(lat, lon) from a fixed center (equirectangular)
+        
+        Over a scan radius of a few miles the curvature correction of the
+        Haversine formula is far below the grid's 20% overlap, so the
+        longitude offset is simply scaled by the cosine of the center
+        latitude, computed once here. The returned function works on scalars
+        as well as NumPy arrays.
+        """
+        cos_c = math.cos(math.radians(center_lat))
+        
+        def distance_miles(lat, lon):
+            dx = (lon - center_lon) * cos_c
+            dy = lat - center_lat
+            return np.hypot(dx, dy) * 69.0  # Miles per degree, as used for radius_deg
+        
+        return distance_miles
+
+
+SESSION_TTL_SECONDS = 3600  # Redis sessions expire after an hour of inactivity
+SSE_POLL_SECONDS = 0.5       # How often /events checks a session for changes
+SSE_KEEPALIVE_SECONDS = 21   # Longest quiet period on /events before a ping
+LONG_POLL_SECONDS = 25       # Longest a ?wait=1 status request is held open
+
+
+class MemorySessionStore:
+    """Keep scanning sessions in this process (single worker deployments)"""
+    
+    def __init__(self):
+        self._sessions = {}
+        self._grids = {}
+        self._bookmarks = {}
+        self._locks = {}
+    
+    def create(self, session_id: str, state: Dict, grid: Dict[str, np.ndarray]):
+        """Register a new session with its scan grid"""
+        self._sessions[session_id] = dict(state)
+        self._grids[session_id] = grid
+        self._bookmarks[session_id] = []
+        self._locks[session_id] = threading.Lock()
+    
+    def get(self, session_id: Optional[str]) -> Optional[Dict]:
+        """Return the session state, or None if there is no such session"""
+        return self._sessions.get(session_id) if session_id else None
+    
+    def modify(self, session_id: str, mutate: Callable[[Dict], Dict]) -> Dict:
+        """Apply the changes returned by mutate(state) and return the new state
+        
+        Holds the session's lock throughout, so concurrent requests on a
+        threaded server (auto-advance plus manual clicks) can't lose updates.
+        """
+        with self._locks[session_id]:
+            scan_session = self._sessions[session_id]
+            scan_session.update(mutate(scan_session))
+            return scan_session
+    
+    def get_point(self, session_id: str, index: int) -> Optional[Dict]:
+        """Return one grid point, or None if the index is out of range"""
+        grid = self._grids[session_id]
+        if not 0 <= index < len(grid['lat']):
+            return None
+        record = {name: column[index] for name, column in grid.items()}
+        return GridCalculator.grid_point(index, record, self._sessions[session_id]['zoom_level'])
+    
+    def get_grid(self, session_id: str) -> Dict[str, np.ndarray]:
+        """Return the whole scan grid as parallel arrays"""
+        return self._grids[session_id]
+    
+    def add_bookmark(self, session_id: str, bookmark: Dict, **fields):
+        """Append a bookmark, overwriting any given session fields alongside it"""
+        with self._locks[session_id]:
+            self._bookmarks[session_id].append(bookmark)
+            self._sessions[session_id].update(fields)
+    
+    def get_bookmarks(self, session_id: str) -> List[Dict]:
+        """Return the session's bookmarks in the order they were added"""
+        return self._bookmarks[session_id]
+    
+    def bookmark_count(self, session_id: str) -> int:
+        """Return how many bookmarks the session has"""
+        return len(self._bookmarks[session_id])
+    
+    def bookmarks_version(self, session_id: str) -> Tuple[int, Optional[str]]:
+        """Return the bookmark count and newest bookmark id, which change on every write"""
+        bookmarks = self._bookmarks[session_id]
+        return len(bookmarks), bookmarks[-1]['id'] if bookmarks else None
+    
+    def clear_bookmarks(self, session_id: str):
+        """Remove every bookmark of the session"""
+        with self._locks[session_id]:
+            self._bookmarks[session_id] = []
+
+
+class RedisSessionStore:
+    """Keep scanning sessions in Redis so every worker sees the same state
+    
+    Each session is a hash at ``session:{id}`` holding one JSON value per
+    field, with its bookmarks in the list ``session:{id}:bookmarks``. Every
+    grid column is stored as raw little-endian bytes at
+    ``session:{id}:grid:{column}``, so a single point is read back with a
+    handful of fixed-width GETRANGE calls.
+    """
+    
+    def __init__(self, client):
+        self.redis = client
+    
+    @staticmethod
+    def _keys(session_id: str) -> List[str]:
+        """Every key of a session: state hash, bookmarks, then the grid columns"""
+        key = f'session:{session_id}'
+        return [key, f'{key}:bookmarks'] + [f'{key}:grid:{name}' for name in GRID_DTYPES]
+    
+    @staticmethod
+    def _encode(fields: Dict) -> Dict:
+        return {name: orjson.dumps(value) for name, value in fields.items()}
+    
+    @staticmethod
+    def _decode(raw: Dict) -> Dict:
+        return {name.decode(): orjson.loads(value) for name, value in raw.items()}
+    
+    def _touch(self, pipe, session_id: str):
+        """Push back the expiry of every key belonging to a session"""
+        for key in self._keys(session_id):
+            pipe.expire(key, SESSION_TTL_SECONDS)
+    
+    def create(self, session_id: str, state: Dict, grid: Dict[str, np.ndarray]):
+        keys = self._keys(session_id)
+        pipe = self.redis.pipeline()
+        pipe.hset(keys[0], mapping=self._encode(state))
+        for key, (name, dtype) in zip(keys[2:], GRID_DTYPES.items()):
+            pipe.set(key, grid[name].astype(dtype, copy=False).tobytes())
+        self._touch(pipe, session_id)
+        pipe.execute()
+    
+    def get(self, session_id: Optional[str]) -> Optional[Dict]:
+        if not session_id:
+            return None
+        # Reads renew the expiry too: a hands-free auto-advance scan writes
+        # nothing per step, and only its status reads show it is still watched.
+        # EXPIRE never recreates a key, so expired sessions stay gone.
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self._keys(session_id)[0])
+        self._touch(pipe, session_id)
+        raw = pipe.execute()[0]
+        return self._decode(raw) if raw else None
+    
+    def modify(self, session_id: str, mutate: Callable[[Dict], Dict]) -> Dict:
+        """Read-modify-write under WATCH so concurrent workers never lose an update"""
+        key = self._keys(session_id)[0]
+        
+        def apply(pipe):
+            scan_session = self._decode(pipe.hgetall(key))
+            changes = mutate(scan_session)
+            pipe.multi()
+            if changes:
+                pipe.hset(key, mapping=self._encode(changes))
+            self._touch(pipe, session_id)
+            scan_session.update(changes)
+            return scan_session
+        
+        return self.redis.transaction(apply, key, value_from_callable=True)
+    
+    def get_point(self, session_id: str, index: int) -> Optional[Dict]:
+        if index < 0:
+            return None
+        keys = self._keys(session_id)
+        pipe = self.redis.pipeline()
+        pipe.hget(keys[0], 'zoom_level')
+        for key, dtype in zip(keys[2:], GRID_DTYPES.values()):
+            start = index * dtype.itemsize
+            pipe.getrange(key, start, start + dtype.itemsize - 1)
+        zoom_level, *columns = pipe.execute()
+        if zoom_level is None or not columns[0]:
+            return None
+        record = {name: np.frombuffer(raw, dtype)[0]
+                  for (name, dtype), raw in zip(GRID_DTYPES.items(), columns)}
+        return GridCalculator.grid_point(index, record, orjson.loads(zoom_level))
+    
+    def get_grid(self, session_id: str) -> Dict[str, np.ndarray]:
+        columns = self.redis.mget(self._keys(session_id)[2:])
+        return {name: np.frombuffer(raw or b'', dtype)
+                for (name, dtype), raw in zip(GRID_DTYPES.items(), columns)}
+    
+    def add_bookmark(self, session_id: str, bookmark: Dict, **fields):
+        """O(1) RPUSH of the new bookmark; existing bookmarks are never rewritten"""
+        keys = self._keys(session_id)
+        pipe = self.redis.pipeline()
+        pipe.rpush(keys[1], orjson.dumps(bookmark))
+        if fields:
+            pipe.hset(keys[0], mapping=self._encode(fields))
+        self._touch(pipe, session_id)
+        pipe.execute()
+    
+    def get_bookmarks(self, session_id: str) -> List[Dict]:
+        # Splice the stored documents into one JSON array and parse it in a single call
+        raw = self.redis.lrange(self._keys(session_id)[1], 0, -1)
+        return orjson.loads(b'[' + b','.join(raw) + b']')
+    
+    def bookmark_count(self, session_id: str) -> int:
+        return self.redis.llen(self._keys(session_id)[1])
+    
+    def bookmarks_version(self, session_id: str) -> Tuple[int, Optional[str]]:
+        key = self._keys(session_id)[1]
+        pipe = self.redis.pipeline()
+        pipe.llen(key)
+        pipe.lindex(key, -1)
+        count, last = pipe.execute()
+        return count, orjson.loads(last)['id'] if last else None
+    
+    def clear_bookmarks(self, session_id: str):
+        pipe = self.redis.pipeline()
+        pipe.delete(self._keys(session_id)[1])
+        self._touch(pipe, session_id)
+        pipe.execute()
+
+
+def _create_session_store():
+    """Share sessions through Redis when REDIS_URL is set, else keep them in memory"""
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url:
+        return MemorySessionStore()
+    
+    import redis
+    return RedisSessionStore(redis.Redis.from_url(redis_url))
+
+
+scanning_sessions = _create_session_store()
+
+# Woken on every write this process makes, so waiting requests answer at once.
+# Auto-advance steps and writes from other workers aren't signalled, which
+# is why every wait is also bounded by SSE_POLL_SECONDS.
+session_changed = threading.Condition()
+
+
+def _notify_session_changed():
+    with session_changed:
+        session_changed.notify_all()
+
+
+def _wait_for_change(timeout: float):
+    with session_changed:
+        session_changed.wait(timeout)
+
+
+def _current_index(scan_session: Dict, now: float) -> int:
+    """Scan position at time now, including auto-advance steps not yet stored
+    
+    Auto-advance is never written per step: while it runs, the position is
+    derived from the wall clock and advance_started_at on every read.
+    """
+    index = scan_session['current_index']
+    started_at = scan_session['advance_started_at']
+    if started_at is None:
+        return index
+    
+    steps = int((now - started_at) / scan_session['speed_seconds'])
+    return min(index + steps, scan_session['total_points'] - 1)
+
+
+def _scan_status(session_id: str, scan_session: Dict, current_index: int) -> Dict:
+    """Status payload shared by /get_current_location and /events"""
+    total_points = scan_session['total_points']
+    
+    if current_index < total_points:
+        current_point = scanning_sessions.get_point(session_id, current_index)
+        progress = (current_index / total_points) * 100
         
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        return R * c
+        return {
+            'success': True,
+            'current_point': current_point,
+            'current_index': current_index,
+            'total_points': total_points,
+            'progress_percent': round(progress, 1),
+            'is_running': scan_session['is_running'],
+            'is_paused': scan_session['is_paused'],
+            'auto_advance': scan_session['auto_advance']
+        }
+    else:
+        return {
+            'success': True,
+            'completed': True,
+            'progress_percent': 100
+        }
+
+
+def _run_flags(scan_session: Dict) -> str:
+    """The is_running, is_paused and auto_advance flags as a string of 0s and 1s"""
+    return ''.join(str(int(scan_session[flag])) for flag in ('is_running', 'is_paused', 'auto_advance'))
+
+
+def _conditional_json(version: str, build: Callable[[], Dict], cache_control: str = 'no-cache'):
+    """Respond with jsonify(build()) tagged by version, or 304 if the client has it
+    
+    The tag is a short hash of version, so session ids never show up in
+    headers, and weak because the bytes on the wire vary with the negotiated
+    compression while the JSON they carry does not. The default no-cache
+    makes the browser revalidate plain fetch() calls by itself.
+    """
+    etag = hashlib.blake2s(version.encode(), digest_size=8).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
 
 
 @app.route('/')
 def index():
-    """Main scanner interface"""
-    return render_template('scanner.html')
+    """Main scanner interface, resuming the visitor's scan if it is still live"""
+    session_id = session.get('session_id')
+    if not scanning_sessions.get(session_id):
+        session_id = None
+    return render_template('scanner.html', session_id=session_id)
 
 
 @app.route('/setup_scan', methods=['POST'])
@@ -107,31 +524,35 @@ def setup_scan():
         radius_miles = float(data['radius_miles'])
         zoom_level = int(data['zoom_level'])
         speed_seconds = float(data['speed_seconds'])
+        if speed_seconds <= 0:
+            raise ValueError('Scanning speed must be a positive number of seconds')
         
         # Generate unique session ID
-        session_id = str(uuid.uuid4())
+        session_id = secrets.token_urlsafe(16)
         
         # Calculate grid points for systematic coverage
-        grid_points = GridCalculator.calculate_scan_grid(
+        grid = GridCalculator.calculate_scan_grid(
             center_lat, center_lon, radius_miles, zoom_level
         )
+        total_points = len(grid['lat'])
         
-        # Store session data in memory
-        scanning_sessions[session_id] = {
+        # Store session data in the session store
+        scanning_sessions.create(session_id, {
             'id': session_id,
             'center_lat': center_lat,
             'center_lon': center_lon,
             'radius_miles': radius_miles,
             'zoom_level': zoom_level,
             'speed_seconds': speed_seconds,
-            'grid_points': grid_points,
+            'total_points': total_points,
             'current_index': 0,
             'is_running': False,
             'is_paused': False,
-            'bookmarks': [],
-            'created_at': datetime.now().isoformat(),
-            'last_activity': datetime.now().isoformat()
-        }
+            'auto_advance': False,
+            'advance_started_at': None,  # Set while auto-advance is counting
+            'created_at': int(time.time()),  # Unix seconds; formatted on export
+            'last_activity': int(time.time())
+        }, grid)
         
         # Store session ID in user's browser session
         session['session_id'] = session_id
@@ -139,8 +560,9 @@ def setup_scan():
         return jsonify({
             'success': True,
             'session_id': session_id,
-            'total_points': len(grid_points),
-            'estimated_time_minutes': len(grid_points) * speed_seconds / 60
+            'total_points': total_points,
+            'estimated_time_minutes': total_points * speed_seconds / 60,
+            'embed_url_template': GOOGLE_EMBED_URL_TEMPLATE
         })
         
     except Exception as e:
@@ -151,33 +573,108 @@ def setup_scan():
 def get_current_location():
     """Get current scanning location and progress"""
     session_id = session.get('session_id')
+    scan_session = scanning_sessions.get(session_id)
     
-    if not session_id or session_id not in scanning_sessions:
+    if not scan_session:
         return jsonify({'error': 'No active scanning session'})
     
-    scan_session = scanning_sessions[session_id]
-    current_index = scan_session['current_index']
-    grid_points = scan_session['grid_points']
+    current_index = _current_index(scan_session, time.time())
+    flags = _run_flags(scan_session)
     
-    if current_index < len(grid_points):
-        current_point = grid_points[current_index]
-        progress = (current_index / len(grid_points)) * 100
-        
-        return jsonify({
-            'success': True,
-            'current_point': current_point,
-            'current_index': current_index,
-            'total_points': len(grid_points),
-            'progress_percent': round(progress, 1),
-            'is_running': scan_session['is_running'],
-            'is_paused': scan_session['is_paused']
-        })
-    else:
-        return jsonify({
-            'success': True,
-            'completed': True,
-            'progress_percent': 100
-        })
+    # Long-poll fallback for clients without EventSource: hold the request
+    # until the position moves off `since`, the run flags change, or time runs out
+    since = request.args.get('since', type=int)
+    if request.args.get('wait') and since is not None:
+        deadline = time.monotonic() + LONG_POLL_SECONDS
+        initial_flags = flags
+        while current_index == since and flags == initial_flags:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _wait_for_change(min(remaining, SSE_POLL_SECONDS))
+            scan_session = scanning_sessions.get(session_id)
+            if not scan_session:
+                return jsonify({'error': 'No active scanning session'})
+            current_index = _current_index(scan_session, time.time())
+            flags = _run_flags(scan_session)
+    
+    # The payload is fully determined by the position and the run flags, so
+    # an unchanged poll is answered with 304 before anything is serialized
+    version = f"{session_id}-{current_index}-{flags}"
+    
+    # Not stored by the browser: the page's conditionalFetch keeps the last
+    # ETag and result itself, and long polls always want the fresh payload
+    return _conditional_json(version, lambda: _scan_status(session_id, scan_session, current_index),
+                             cache_control='no-store')
+
+
+@app.route('/events')
+def events():
+    """Push scan status to the browser as server-sent events
+    
+    The stream sends a 'status' event, the /get_current_location payload plus
+    the bookmark count, whenever any of them changes. That covers auto-advance
+    steps too, since it checks the session at least every SSE_POLL_SECONDS
+    and immediately after any write from this process. During
+    quiet periods a comment line keeps proxies from dropping the connection.
+    """
+    session_id = session.get('session_id')
+    
+    if not scanning_sessions.get(session_id):
+        return jsonify({'error': 'No active scanning session'})
+    
+    def generate():
+        last_state = None
+        last_sent = time.monotonic()
+        
+        while True:
+            scan_session = scanning_sessions.get(session_id)
+            if not scan_session:
+                return
+            
+            current_index = _current_index(scan_session, time.time())
+            bookmark_count = scanning_sessions.bookmark_count(session_id)
+            state = (current_index, scan_session['is_running'], scan_session['is_paused'],
+                     scan_session['auto_advance'], bookmark_count)
+            
+            if state != last_state:
+                status = _scan_status(session_id, scan_session, current_index)
+                status['bookmark_count'] = bookmark_count
+                yield f"event: status\ndata: {app.json.dumps(status)}\n\n"
+                last_state = state
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ': ping\n\n'
+                last_sent = time.monotonic()
+            
+            _wait_for_change(SSE_POLL_SECONDS)
+    
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx hold events back
+    return response
+
+
+@app.route('/get_grid')
+def get_grid():
+    """Get every grid point's coordinates as packed binary
+    
+    The body is little-endian float32: all latitudes, then all longitudes.
+    X-Grid-Points carries the count, so the client can take two subarray()
+    views of one Float32Array over the response's ArrayBuffer. float32 keeps
+    coordinates to within about a metre.
+    """
+    session_id = session.get('session_id')
+    
+    if not scanning_sessions.get(session_id):
+        return jsonify({'error': 'No active scanning session'})
+    
+    grid = scanning_sessions.get_grid(session_id)
+    coordinates = np.concatenate([grid['lat'], grid['lon']]).astype('<f4')
+    
+    response = app.response_class(coordinates.tobytes(), mimetype='application/octet-stream')
+    response.headers['X-Grid-Points'] = str(len(grid['lat']))
+    return response
 
 
 @app.route('/control_scan', methods=['POST'])
@@ -185,34 +682,56 @@ def control_scan():
     """Control scanning operations (start, pause, navigate)"""
     session_id = session.get('session_id')
     
-    if not session_id or session_id not in scanning_sessions:
+    if not scanning_sessions.get(session_id):
         return jsonify({'error': 'No active scanning session'})
     
-    action = request.json.get('action')
-    scan_session = scanning_sessions[session_id]
-    
-    if action == 'start':
-        scan_session['is_running'] = True
-        scan_session['is_paused'] = False
-    elif action == 'pause':
-        scan_session['is_paused'] = True
-    elif action == 'resume':
-        scan_session['is_paused'] = False
-    elif action == 'stop':
-        scan_session['is_running'] = False
-        scan_session['is_paused'] = False
-    elif action == 'next':
-        scan_session['current_index'] = min(
-            scan_session['current_index'] + 1,
-            len(scan_session['grid_points']) - 1
-        )
-    elif action == 'previous':
-        scan_session['current_index'] = max(scan_session['current_index'] - 1, 0)
-    elif action == 'jump':
-        index = request.json.get('index', 0)
-        scan_session['current_index'] = max(0, min(index, len(scan_session['grid_points']) - 1))
+    data = request.get_json()
+    action = data.get('action')
+    steps = max(int(data.get('steps', 1)), 1)  # Held arrow keys batch their presses
     
-    scan_session['last_activity'] = datetime.now().isoformat()
+    def apply(scan_session):
+        now = time.time()
+        last_index = scan_session['total_points'] - 1
+        
+        # Fold in any auto-advance steps taken so far, keeping the partial
+        # step so that manual moves don't reset the timer. Re-basing on the
+        # partial step also drops steps clamped away at the last point, which
+        # would otherwise undo a later jump or previous straight away.
+        current_index = _current_index(scan_session, now)
+        started_at = scan_session['advance_started_at']
+        if started_at is not None:
+            started_at = now - (now - started_at) % scan_session['speed_seconds']
+        changes = {'current_index': current_index, 'last_activity': int(now)}
+        
+        if action == 'start':
+            changes.update(is_running=True, is_paused=False)
+        elif action == 'pause':
+            changes['is_paused'] = True
+        elif action == 'resume':
+            changes['is_paused'] = False
+        elif action == 'stop':
+            changes.update(is_running=False, is_paused=False, auto_advance=False)
+        elif action == 'auto_advance':
+            changes['auto_advance'] = bool(data.get('enabled'))
+        elif action == 'next':
+            changes['current_index'] = min(current_index + steps, last_index)
+        elif action == 'previous':
+            changes['current_index'] = max(current_index - steps, 0)
+        elif action == 'jump':
+            index = data.get('index', 0)
+            changes['current_index'] = max(0, min(index, last_index))
+        
+        # Auto-advance only counts while it is enabled and the scan isn't paused
+        state = dict(scan_session, **changes)
+        if state['auto_advance'] and not state['is_paused']:
+            changes['advance_started_at'] = started_at if started_at is not None else now
+        else:
+            changes['advance_started_at'] = None
+        
+        return changes
+    
+    scanning_sessions.modify(session_id, apply)
+    _notify_session_changed()
     
     return jsonify({'success': True})
 
@@ -221,30 +740,30 @@ def control_scan():
 def add_bookmark():
     """Add a bookmark for current location"""
     session_id = session.get('session_id')
+    scan_session = scanning_sessions.get(session_id)
     
-    if not session_id or session_id not in scanning_sessions:
+    if not scan_session:
         return jsonify({'error': 'No active scanning session'})
     
-    scan_session = scanning_sessions[session_id]
-    current_index = scan_session['current_index']
+    current_index = _current_index(scan_session, time.time())
+    current_point = scanning_sessions.get_point(session_id, current_index)
     
-    if current_index < len(scan_session['grid_points']):
-        current_point = scan_session['grid_points'][current_index]
+    if current_point is not None:
         note = request.json.get('note', 'Potential storage facility')
         
         bookmark = {
-            'id': str(uuid.uuid4()),
+            'id': secrets.token_urlsafe(16),
             'lat': current_point['lat'],
             'lon': current_point['lon'],
             'note': note,
             'grid_index': current_index,
             'timestamp': datetime.now().isoformat(),
             'google_maps_url': current_point['google_maps_url'],
-            'street_view_url': f"https://maps.google.com/@{current_point['lat']},{current_point['lon']},3a,75y,0h,90t/data=!3m7!1e1"
+            'street_view_url': current_point['street_view_url']
         }
         
-        scan_session['bookmarks'].append(bookmark)
-        scan_session['last_activity'] = datetime.now().isoformat()
+        scanning_sessions.add_bookmark(session_id, bookmark, last_activity=int(time.time()))
+        _notify_session_changed()
         
         return jsonify({'success': True, 'bookmark': bookmark})
     
@@ -256,772 +775,79 @@ def get_bookmarks():
     """Get all bookmarks for current session"""
     session_id = session.get('session_id')
     
-    if not session_id or session_id not in scanning_sessions:
+    if not scanning_sessions.get(session_id):
+        return jsonify({'error': 'No active scanning session'})
+    
+    # Bookmarks are only ever appended, so count plus newest id identifies the list
+    count, last_id = scanning_sessions.bookmarks_version(session_id)
+    version = f"{session_id}-{count}-{last_id}"
+    return _conditional_json(version, lambda: {
+        'success': True,
+        'bookmarks': scanning_sessions.get_bookmarks(session_id)
+    })
+
+
+@app.route('/clear_bookmarks', methods=['DELETE'])
+def clear_bookmarks():
+    """Delete all bookmarks for current session"""
+    session_id = session.get('session_id')
+    
+    if not scanning_sessions.get(session_id):
         return jsonify({'error': 'No active scanning session'})
     
-    bookmarks = scanning_sessions[session_id]['bookmarks']
-    return jsonify({'success': True, 'bookmarks': bookmarks})
+    scanning_sessions.clear_bookmarks(session_id)
+    _notify_session_changed()
+    return jsonify({'success': True})
 
 
 @app.route('/export_bookmarks')
 def export_bookmarks():
     """Export bookmarks and scan data as JSON"""
     session_id = session.get('session_id')
+    scan_session = scanning_sessions.get(session_id)
     
-    if not session_id or session_id not in scanning_sessions:
-        return jsonify({'error': 'No active scanning session'})
+    if not scan_session:
+        # 404 so a download link fails in place instead of showing this JSON
+        return jsonify({'error': 'No active scanning session'}), 404
     
-    scan_session = scanning_sessions[session_id]
-    
-    export_data = {
-        'scan_info': {
-            'center_lat': scan_session['center_lat'],
-            'center_lon': scan_session['center_lon'],
-            'radius_miles': scan_session['radius_miles'],
-            'zoom_level': scan_session['zoom_level'],
-            'total_points_scanned': scan_session['current_index'],
-            'scan_date': scan_session['created_at']
-        },
-        'bookmarks': scan_session['bookmarks'],
-        'summary': {
-            'total_bookmarks': len(scan_session['bookmarks']),
-            'areas_scanned': scan_session['current_index'],
-            'completion_percentage': (scan_session['current_index'] / len(scan_session['grid_points'])) * 100
-        }
+    bookmarks = scanning_sessions.get_bookmarks(session_id)
+    current_index = _current_index(scan_session, time.time())
+    
+    scan_info = {
+        'center_lat': scan_session['center_lat'],
+        'center_lon': scan_session['center_lon'],
+        'radius_miles': scan_session['radius_miles'],
+        'zoom_level': scan_session['zoom_level'],
+        'total_points_scanned': current_index,
+        'scan_date': datetime.fromtimestamp(scan_session['created_at']).isoformat()
+    }
+    summary = {
+        'total_bookmarks': len(bookmarks),
+        'areas_scanned': current_index,
+        'completion_percentage': (current_index / scan_session['total_points']) * 100
     }
     
-    return jsonify(export_data)
-
+    def generate():
+        # Same document as one jsonify call, written out a bookmark at a time
+        yield b'{"scan_info":' + orjson.dumps(scan_info) + b',"bookmarks":['
+        for i, bookmark in enumerate(bookmarks):
+            yield (b',' if i else b'') + orjson.dumps(bookmark)
+        yield b'],"summary":' + orjson.dumps(summary) + b'}'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    if request.args.get('download'):
+        filename = f"storage_facility_scan_{datetime.now().date().isoformat()}.json"
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 if __name__ == '__main__':
-    # Create templates directory if it doesn't exist
-    import os
-    os.makedirs('templates', exist_ok=True)
-    
-    # Write the improved HTML template
-    with open('templates/scanner.html', 'w', encoding='utf-8') as f:
-        template_content = '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Self-Storage Facility Scanner</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-            margin: 0; padding: 20px; background-color: #f8f9fa; line-height: 1.6;
-        }
-        .container { 
-            max-width: 1400px; margin: 0 auto; background: white; 
-            padding: 30px; border-radius: 12px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); 
-        }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h1 { color: #2c3e50; font-size: 2.5em; margin-bottom: 10px; }
-        .header p { color: #6c757d; font-size: 1.1em; }
-        
-        .section { 
-            margin-bottom: 25px; padding: 20px; border: 2px solid #e9ecef; 
-            border-radius: 8px; background-color: #ffffff;
-        }
-        .section h3 { margin-top: 0; color: #495057; border-bottom: 2px solid #e9ecef; padding-bottom: 10px; }
-        
-        .form-group { margin-bottom: 15px; }
-        .form-group label { display: block; margin-bottom: 8px; font-weight: 600; color: #495057; }
-        .form-group input, .form-group select { 
-            width: 250px; padding: 12px; border: 2px solid #ced4da; 
-            border-radius: 6px; font-size: 14px; transition: border-color 0.2s;
-        }
-        .form-group input:focus, .form-group select:focus {
-            outline: none; border-color: #007bff; box-shadow: 0 0 0 3px rgba(0,123,255,0.1);
-        }
-        
-        .controls { display: flex; gap: 12px; margin: 20px 0; flex-wrap: wrap; }
-        .btn { 
-            padding: 12px 24px; border: none; border-radius: 6px; cursor: pointer; 
-            font-size: 14px; font-weight: 600; transition: all 0.2s; text-decoration: none;
-            display: inline-block; text-align: center;
-        }
-        .btn:hover { transform: translateY(-1px); box-shadow: 0 4px 12px rgba(0,0,0,0.15); }
-        .btn-primary { background-color: #007bff; color: white; }
-        .btn-success { background-color: #28a745; color: white; }
-        .btn-warning { background-color: #ffc107; color: #212529; }
-        .btn-danger { background-color: #dc3545; color: white; }
-        .btn-secondary { background-color: #6c757d; color: white; }
-        .btn-info { background-color: #17a2b8; color: white; }
-        
-        .progress-container { margin: 20px 0; }
-        .progress-bar { 
-            width: 100%; height: 24px; background-color: #e9ecef; 
-            border-radius: 12px; overflow: hidden; position: relative;
-        }
-        .progress-fill { 
-            height: 100%; background: linear-gradient(90deg, #007bff, #0056b3); 
-            transition: width 0.3s ease; border-radius: 12px;
-        }
-        .progress-text { text-align: center; margin-top: 8px; font-weight: 600; color: #495057; }
-        
-        .current-location { 
-            padding: 20px; background: linear-gradient(135deg, #e3f2fd, #bbdefb); 
-            border-left: 6px solid #2196f3; margin: 20px 0; border-radius: 6px;
-        }
-        .current-location strong { color: #1565c0; }
-        
-        .bookmark-item { 
-            padding: 15px; margin: 10px 0; background-color: #f8f9fa; 
-            border-left: 4px solid #28a745; border-radius: 6px;
-        }
-        .bookmark-item a { color: #007bff; text-decoration: none; margin-right: 15px; }
-        .bookmark-item a:hover { text-decoration: underline; }
-        
-        .status { 
-            padding: 15px; margin: 15px 0; border-radius: 6px; 
-            font-weight: 600; text-align: center;
-        }
-        .status.running { background-color: #d4edda; color: #155724; border: 2px solid #c3e6cb; }
-        .status.paused { background-color: #fff3cd; color: #856404; border: 2px solid #ffeaa7; }
-        .status.stopped { background-color: #f8d7da; color: #721c24; border: 2px solid #f1b0b7; }
-        
-        .maps-container { 
-            display: grid; grid-template-columns: 1fr 1fr; gap: 15px; 
-            margin: 20px 0; min-height: 400px;
-        }
-        .maps-frame { 
-            width: 100%; height: 400px; border: 2px solid #dee2e6; 
-            border-radius: 8px;
-        }
-        .map-option { 
-            background: #f8f9fa; padding: 15px; border-radius: 8px; 
-            border: 2px solid #e9ecef; margin: 10px 0;
-        }
-        .map-option h4 { margin: 0 0 10px 0; color: #495057; }
-        .map-links { display: flex; gap: 10px; flex-wrap: wrap; }
-        
-        .hidden { display: none; }
-        .bookmark-note { width: 350px; margin-right: 10px; }
-        
-        .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }
-        .stat-card { background: #f8f9fa; padding: 15px; border-radius: 8px; text-align: center; }
-        .stat-number { font-size: 2em; font-weight: bold; color: #007bff; }
-        .stat-label { color: #6c757d; font-size: 0.9em; }
-        
-        .auto-advance { 
-            background: #e7f3ff; padding: 15px; border-radius: 8px; 
-            border-left: 4px solid #007bff; margin: 15px 0;
-        }
-        .coordinate-display {
-            font-family: monospace; font-size: 1.1em; color: #495057;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🏢 Self-Storage Facility Scanner</h1>
-            <p>Systematically discover storage facilities in any area</p>
-        </div>
-        
-        <!-- Setup Section -->
-        <div class="section" id="setup-section">
-            <h3>📍 Configure Scanning Area</h3>
-            <div class="form-group">
-                <label for="center-lat">Center Latitude:</label>
-                <input type="number" step="0.000001" id="center-lat" value="35.4922086" placeholder="e.g., 35.4922086">
-            </div>
-            <div class="form-group">
-                <label for="center-lon">Center Longitude:</label>
-                <input type="number" step="0.000001" id="center-lon" value="-94.2260868" placeholder="e.g., -94.2260868">
-            </div>
-            <div class="form-group">
-                <label for="radius">Search Radius (miles):</label>
-                <input type="number" step="0.1" id="radius" value="6" min="1" max="20">
-            </div>
-            <div class="form-group">
-                <label for="zoom">Detail Level (Zoom):</label>
-                <select id="zoom">
-                    <option value="15">15 - Wide overview (1.4 mi view)</option>
-                    <option value="16">16 - Neighborhood (0.7 mi view)</option>
-                    <option value="17">17 - Block level (0.35 mi view)</option>
-                    <option value="18" selected>18 - Building detail (0.17 mi view)</option>
-                    <option value="19">19 - Maximum detail (0.09 mi view)</option>
-                </select>
-            </div>
-            <div class="form-group">
-                <label for="speed">Scanning Speed (seconds per location):</label>
-                <input type="number" step="0.5" id="speed" value="3.0" min="1" max="10">
-            </div>
-            <button class="btn btn-primary" onclick="setupScan()">🚀 Calculate Scanning Grid</button>
-        </div>
-        
-        <!-- Scanning Section -->
-        <div class="section hidden" id="scanning-section">
-            <h3>🎮 Scanning Controls</h3>
-            
-            <div id="status" class="status stopped">Ready to begin scanning</div>
-            
-            <div class="controls">
-                <button class="btn btn-success" onclick="startScan()">▶️ Start Scanning</button>
-                <button class="btn btn-warning" onclick="pauseScan()">⏸️ Pause</button>
-                <button class="btn btn-success" onclick="resumeScan()">⏯️ Resume</button>
-                <button class="btn btn-danger" onclick="stopScan()">⏹️ Stop</button>
-            </div>
-            
-            <div class="controls">
-                <button class="btn btn-secondary" onclick="previousLocation()">⏪ Previous Location</button>
-                <button class="btn btn-secondary" onclick="nextLocation()">⏩ Next Location</button>
-                <button class="btn btn-info" onclick="jumpToLocation()">🎯 Jump to Location</button>
-            </div>
-            
-            <!-- Auto-advance toggle -->
-            <div class="auto-advance">
-                <label style="display: flex; align-items: center; gap: 10px;">
-                    <input type="checkbox" id="auto-advance" onchange="toggleAutoAdvance()">
-                    <strong>🤖 Auto-advance every <span id="speed-display">3</span> seconds</strong>
-                </label>
-                <small style="color: #6c757d;">When enabled, automatically moves to the next location for hands-free scanning</small>
-            </div>
-            
-            <div class="progress-container">
-                <div class="progress-bar">
-                    <div class="progress-fill" id="progress-fill" style="width: 0%"></div>
-                </div>
-                <div class="progress-text" id="progress-text">0% complete</div>
-            </div>
-            
-            <div class="current-location" id="current-location">
-                <strong>📍 Current Location:</strong> <span class="coordinate-display" id="location-coords">Scanning not started</span><br>
-                <strong>📊 Position:</strong> <span id="location-index">0 / 0</span><br>
-                <strong>🎯 Distance from center:</strong> <span id="distance-from-center">-</span> miles
-            </div>
-            
-            <!-- Multiple Map Options -->
-            <div class="map-option">
-                <h4>🗺️ For Detailed Satellite View (if needed)</h4>
-                <div class="map-links">
-                    <button class="btn btn-primary" onclick="openInGoogleMaps()">🛰️ Google Satellite</button>
-                    <button class="btn btn-info" onclick="openInBingMaps()">🌍 Bing Satellite</button>
-                </div>
-                <small style="color: #6c757d;">Use these only if you need higher resolution satellite imagery</small>
-            </div>
-            
-            <!-- Embedded Maps Grid -->
-            <div class="maps-container">
-                <div>
-                    <h4 style="margin: 0 0 10px 0;">🗺️ Area Navigation (Building Outlines)</h4>
-                    <iframe id="osm-frame" class="maps-frame" src="" allowfullscreen="" loading="lazy" 
-                            title="Area map showing building outlines and roads"></iframe>
-                </div>
-                <div>
-                    <h4 style="margin: 0 0 10px 0;">🛰️ Satellite Access & Scanning Guide</h4>
-                    <iframe id="alt-frame" class="maps-frame" src="" allowfullscreen="" loading="lazy" 
-                            title="Satellite access and scanning guide"></iframe>
-                </div>
-            </div>
-            
-            <!-- Bookmark Section -->
-            <div style="margin-top: 25px; padding: 20px; background-color: #f8f9fa; border-radius: 8px;">
-                <h4>📍 Bookmark Current Location</h4>
-                <p style="color: #6c757d; margin-bottom: 15px;">
-                    Spotted a potential storage facility? Add a bookmark with notes for later review.
-                </p>
-                <div style="display: flex; gap: 10px; align-items: center; flex-wrap: wrap;">
-                    <input type="text" id="bookmark-note" class="bookmark-note" 
-                           placeholder="Describe what you see (e.g., 'Multiple buildings with garage doors')">
-                    <button class="btn btn-success" onclick="addBookmark()">📍 Add Bookmark</button>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Bookmarks Section -->
-        <div class="section hidden" id="bookmarks-section">
-            <h3>📚 Discovered Locations</h3>
-            <div class="stats-grid" id="stats-grid">
-                <div class="stat-card">
-                    <div class="stat-number" id="bookmark-count">0</div>
-                    <div class="stat-label">Bookmarks</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number" id="areas-scanned">0</div>
-                    <div class="stat-label">Areas Scanned</div>
-                </div>
-                <div class="stat-card">
-                    <div class="stat-number" id="completion-percent">0%</div>
-                    <div class="stat-label">Complete</div>
-                </div>
-            </div>
-            
-            <div id="bookmarks-list"></div>
-            
-            <div style="margin-top: 20px;">
-                <button class="btn btn-primary" onclick="exportBookmarks()">💾 Export Results</button>
-                <button class="btn btn-secondary" onclick="clearBookmarks()">🗑️ Clear All Bookmarks</button>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let scanInterval = null;
-        let autoAdvanceInterval = null;
-        let currentSession = null;
-        let currentPoint = null;
-        
-        async function setupScan() {
-            const centerLat = parseFloat(document.getElementById('center-lat').value);
-            const centerLon = parseFloat(document.getElementById('center-lon').value);
-            const radius = parseFloat(document.getElementById('radius').value);
-            const zoom = parseInt(document.getElementById('zoom').value);
-            const speed = parseFloat(document.getElementById('speed').value);
-            
-            // Update speed display
-            document.getElementById('speed-display').textContent = speed;
-            
-            // Validation
-            if (isNaN(centerLat) || isNaN(centerLon) || isNaN(radius) || isNaN(speed)) {
-                alert('Please fill in all fields with valid numbers.');
-                return;
-            }
-            
-            if (radius < 1 || radius > 20) {
-                alert('Radius must be between 1 and 20 miles.');
-                return;
-            }
-            
-            try {
-                const response = await fetch('/setup_scan', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({
-                        center_lat: centerLat,
-                        center_lon: centerLon,
-                        radius_miles: radius,
-                        zoom_level: zoom,
-                        speed_seconds: speed
-                    })
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    currentSession = result.session_id;
-                    document.getElementById('setup-section').style.display = 'none';
-                    document.getElementById('scanning-section').classList.remove('hidden');
-                    document.getElementById('bookmarks-section').classList.remove('hidden');
-                    
-                    updateStatus();
-                    updateStats();
-                    alert(`✅ Scan setup complete!\\n\\n📊 ${result.total_points} locations to scan\\n⏱️ Estimated time: ${result.estimated_time_minutes.toFixed(1)} minutes\\n\\nClick "Start Scanning" when ready!`);
-                } else {
-                    alert('❌ Setup failed: ' + result.error);
-                }
-            } catch (error) {
-                alert('❌ Setup failed: ' + error.message);
-            }
-        }
-        
-        function toggleAutoAdvance() {
-            const checkbox = document.getElementById('auto-advance');
-            const speed = parseFloat(document.getElementById('speed').value) * 1000; // Convert to milliseconds
-            
-            if (checkbox.checked) {
-                autoAdvanceInterval = setInterval(() => {
-                    nextLocation();
-                }, speed);
-                document.getElementById('status').textContent = '🤖 Auto-scanning in progress...';
-            } else {
-                if (autoAdvanceInterval) {
-                    clearInterval(autoAdvanceInterval);
-                    autoAdvanceInterval = null;
-                }
-            }
-        }
-        
-        async function startScan() {
-            await controlScan('start');
-            scanInterval = setInterval(updateStatus, 1000);
-            document.getElementById('status').className = 'status running';
-            document.getElementById('status').textContent = '▶️ Scanning in progress... Watch for storage facilities!';
-        }
-        
-        async function pauseScan() {
-            await controlScan('pause');
-            if (scanInterval) {
-                clearInterval(scanInterval);
-                scanInterval = null;
-            }
-            document.getElementById('status').className = 'status paused';
-            document.getElementById('status').textContent = '⏸️ Scan paused - Click Resume to continue';
-        }
-        
-        async function resumeScan() {
-            await controlScan('resume');
-            scanInterval = setInterval(updateStatus, 1000);
-            document.getElementById('status').className = 'status running';
-            document.getElementById('status').textContent = '▶️ Scanning resumed... Watch for storage facilities!';
-        }
-        
-        async function stopScan() {
-            await controlScan('stop');
-            if (scanInterval) {
-                clearInterval(scanInterval);
-                scanInterval = null;
-            }
-            if (autoAdvanceInterval) {
-                clearInterval(autoAdvanceInterval);
-                autoAdvanceInterval = null;
-            }
-            document.getElementById('auto-advance').checked = false;
-            document.getElementById('status').className = 'status stopped';
-            document.getElementById('status').textContent = '⏹️ Scan stopped';
-        }
-        
-        async function nextLocation() {
-            await controlScan('next');
-            updateStatus();
-        }
-        
-        async function previousLocation() {
-            await controlScan('previous');
-            updateStatus();
-        }
-        
-        async function jumpToLocation() {
-            const index = prompt('Enter location number (1 to ' + document.getElementById('location-index').textContent.split(' / ')[1] + '):');
-            if (index && !isNaN(index)) {
-                await controlScan('jump', parseInt(index) - 1);
-                updateStatus();
-            }
-        }
-        
-        function openInGoogleMaps() {
-            if (currentPoint) {
-                // Fixed Google Maps URL for satellite view
-                const googleSatelliteUrl = `https://www.google.com/maps/@${currentPoint.lat},${currentPoint.lon},19z/data=!3m1!1e3`;
-                window.open(googleSatelliteUrl, '_blank');
-            }
-        }
-        
-        function openInBingMaps() {
-            if (currentPoint) {
-                // Bing Maps satellite view
-                const bingUrl = `https://www.bing.com/maps?cp=${currentPoint.lat}~${currentPoint.lon}&lvl=19&style=a`;
-                window.open(bingUrl, '_blank');
-            }
-        }
-        
-        function openStreetView() {
-            if (currentPoint) {
-                const streetViewUrl = `https://maps.google.com/@${currentPoint.lat},${currentPoint.lon},3a,75y,0h,90t/data=!3m7!1e1`;
-                window.open(streetViewUrl, '_blank');
-            }
-        }
-        
-        async function controlScan(action, index = null) {
-            try {
-                const body = { action: action };
-                if (index !== null) body.index = index;
-                
-                await fetch('/control_scan', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(body)
-                });
-            } catch (error) {
-                console.error('Control action failed:', error);
-            }
-        }
-        
-        async function updateStatus() {
-            try {
-                const response = await fetch('/get_current_location');
-                const result = await response.json();
-                
-                if (result.success) {
-                    if (result.completed) {
-                        document.getElementById('progress-fill').style.width = '100%';
-                        document.getElementById('progress-text').textContent = '🎉 100% complete - Scan finished!';
-                        if (scanInterval) {
-                            clearInterval(scanInterval);
-                            scanInterval = null;
-                        }
-                        if (autoAdvanceInterval) {
-                            clearInterval(autoAdvanceInterval);
-                            autoAdvanceInterval = null;
-                        }
-                        document.getElementById('auto-advance').checked = false;
-                        document.getElementById('status').className = 'status stopped';
-                        document.getElementById('status').textContent = '✅ Scan completed! Review your bookmarks below.';
-                    } else {
-                        currentPoint = result.current_point;
-                        document.getElementById('progress-fill').style.width = result.progress_percent + '%';
-                        document.getElementById('progress-text').textContent = `${result.progress_percent}% complete`;
-                        document.getElementById('location-coords').textContent = `${currentPoint.lat}, ${currentPoint.lon}`;
-                        document.getElementById('location-index').textContent = `${result.current_index + 1} / ${result.total_points}`;
-                        document.getElementById('distance-from-center').textContent = currentPoint.distance_from_center;
-                        
-                        // Update embedded maps
-                        updateEmbeddedMaps(currentPoint);
-                    }
-                    updateStats();
-                }
-            } catch (error) {
-                console.error('Status update failed:', error);
-            }
-        }
-        
-        function updateEmbeddedMaps(point) {
-            // Keep the OpenStreetMap for navigation reference (shows roads, building outlines)
-            const osmUrl = `https://www.openstreetmap.org/export/embed.html?bbox=${point.lon-0.001},${point.lat-0.001},${point.lon+0.001},${point.lat+0.001}&layer=mapnik&marker=${point.lat},${point.lon}`;
-            document.getElementById('osm-frame').src = osmUrl;
-            
-            // Enhanced satellite access panel
-            const satelliteGuideHtml = `
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <style>
-                        body { margin: 0; padding: 20px; font-family: Arial, sans-serif; background: #f8f9fa; }
-                        .location-info { text-align: center; margin-bottom: 20px; }
-                        .coordinates { 
-                            font-family: monospace; font-size: 1.2em; color: #495057; 
-                            background: white; padding: 10px; border-radius: 5px; margin: 10px 0;
-                        }
-                        .satellite-section { 
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white; padding: 20px; border-radius: 8px; margin: 15px 0;
-                            text-align: center;
-                        }
-                        .sat-link { 
-                            display: inline-block; padding: 15px 25px; background: rgba(255,255,255,0.2); 
-                            color: white; text-decoration: none; border-radius: 6px; margin: 8px;
-                            font-weight: 600; border: 2px solid rgba(255,255,255,0.3);
-                            transition: all 0.3s ease;
-                        }
-                        .sat-link:hover { 
-                            background: rgba(255,255,255,0.3); 
-                            border-color: rgba(255,255,255,0.6);
-                            transform: translateY(-2px);
-                        }
-                        .guide { 
-                            background: white; padding: 20px; border-radius: 8px; 
-                            border-left: 4px solid #28a745; margin-top: 20px;
-                        }
-                        .checklist { text-align: left; margin-top: 15px; }
-                        .checklist li { margin: 8px 0; font-size: 14px; }
-                        .workflow-tip {
-                            background: #fff3cd; padding: 15px; border-radius: 6px; 
-                            border-left: 4px solid #ffc107; margin-top: 15px;
-                        }
-                    </style>
-                </head>
-                <body>
-                    <div class="location-info">
-                        <h3 style="color: #495057; margin: 0;">📍 Current Location</h3>
-                        <div class="coordinates">${point.lat}, ${point.lon}</div>
-                        <div style="color: #6c757d;">${point.distance_from_center} miles from center</div>
-                    </div>
-                    
-                    <div class="satellite-section">
-                        <h4 style="margin: 0 0 15px 0;">🛰️ HIGH-RESOLUTION SATELLITE</h4>
-                        <p style="margin: 0 0 20px 0; opacity: 0.9;">Click for detailed building view:</p>
-                        <a href="https://www.google.com/maps/@${point.lat},${point.lon},19z/data=!3m1!1e3" 
-                           target="_blank" class="sat-link">🔍 Google Satellite</a>
-                        <a href="https://www.bing.com/maps?cp=${point.lat}~${point.lon}&lvl=19&style=a" 
-                           target="_blank" class="sat-link">🌍 Bing Satellite</a>
-                    </div>
-                    
-                    <div class="workflow-tip">
-                        <strong>💡 Scanning Workflow:</strong><br>
-                        1. Check left map for building clusters<br>
-                        2. Click satellite buttons above for detail<br>
-                        3. Look for storage facility patterns<br>
-                        4. Bookmark if found!
-                    </div>
-                    
-                    <div class="guide">
-                        <h4 style="color: #28a745; margin-top: 0;">🔍 Storage Facility Signs</h4>
-                        <div class="checklist">
-                            <li>✅ <strong>Rows of buildings:</strong> Multiple parallel structures</li>
-                            <li>✅ <strong>Garage doors:</strong> Small dark rectangles along buildings</li>
-                            <li>✅ <strong>Internal roads:</strong> Drive lanes between building rows</li>
-                            <li>✅ <strong>Parking areas:</strong> Large paved customer spaces</li>
-                            <li>✅ <strong>Security fence:</strong> Perimeter fencing visible</li>
-                            <li>✅ <strong>Single entrance:</strong> Controlled entry/exit point</li>
-                        </div>
-                    </div>
-                </body>
-                </html>
-            `;
-            
-            document.getElementById('alt-frame').src = 'data:text/html;charset=utf-8,' + encodeURIComponent(satelliteGuideHtml);
-        }
-        
-        async function addBookmark() {
-            const note = document.getElementById('bookmark-note').value || 'Potential storage facility';
-            
-            try {
-                const response = await fetch('/add_bookmark', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({note: note})
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    document.getElementById('bookmark-note').value = '';
-                    updateBookmarks();
-                    updateStats();
-                    
-                    // Visual feedback
-                    const btn = document.querySelector('button[onclick="addBookmark()"]');
-                    const originalText = btn.textContent;
-                    btn.textContent = '✅ Bookmarked!';
-                    btn.style.backgroundColor = '#28a745';
-                    setTimeout(() => {
-                        btn.textContent = originalText;
-                        btn.style.backgroundColor = '';
-                    }, 2000);
-                } else {
-                    alert('❌ Bookmark failed: ' + result.error);
-                }
-            } catch (error) {
-                alert('❌ Bookmark failed: ' + error.message);
-            }
-        }
-        
-        async function updateBookmarks() {
-            try {
-                const response = await fetch('/get_bookmarks');
-                const result = await response.json();
-                
-                if (result.success) {
-                    const bookmarksList = document.getElementById('bookmarks-list');
-                    bookmarksList.innerHTML = '';
-                    
-                    if (result.bookmarks.length === 0) {
-                        bookmarksList.innerHTML = '<p style="color: #6c757d; text-align: center; padding: 20px;">No bookmarks yet. Start scanning and bookmark interesting locations!</p>';
-                        return;
-                    }
-                    
-                    result.bookmarks.forEach((bookmark, index) => {
-                        const div = document.createElement('div');
-                        div.className = 'bookmark-item';
-                        div.innerHTML = `
-                            <div style="display: flex; justify-content: between; align-items: flex-start;">
-                                <div style="flex-grow: 1;">
-                                    <strong>📍 Location ${index + 1}:</strong> ${bookmark.note}<br>
-                                    <strong>🌍 Coordinates:</strong> <span class="coordinate-display">${bookmark.lat}, ${bookmark.lon}</span><br>
-                                    <strong>🕒 Time:</strong> ${new Date(bookmark.timestamp).toLocaleString()}<br>
-                                    <div style="margin-top: 10px;">
-                                        <a href="${bookmark.google_maps_url}" target="_blank">🗺️ Google Maps</a>
-                                        <a href="${bookmark.street_view_url}" target="_blank">👁️ Street View</a>
-                                        <button class="btn btn-info" style="padding: 5px 10px; font-size: 12px;" onclick="jumpToBookmark(${bookmark.grid_index})">🎯 Go to Location</button>
-                                    </div>
-                                </div>
-                            </div>
-                        `;
-                        bookmarksList.appendChild(div);
-                    });
-                }
-            } catch (error) {
-                console.error('Bookmark update failed:', error);
-            }
-        }
-        
-        async function jumpToBookmark(gridIndex) {
-            await controlScan('jump', gridIndex);
-            updateStatus();
-        }
-        
-        async function updateStats() {
-            try {
-                const bookmarksResponse = await fetch('/get_bookmarks');
-                const statusResponse = await fetch('/get_current_location');
-                
-                const bookmarksResult = await bookmarksResponse.json();
-                const statusResult = await statusResponse.json();
-                
-                if (bookmarksResult.success) {
-                    document.getElementById('bookmark-count').textContent = bookmarksResult.bookmarks.length;
-                }
-                
-                if (statusResult.success) {
-                    document.getElementById('areas-scanned').textContent = statusResult.current_index || 0;
-                    document.getElementById('completion-percent').textContent = 
-                        (statusResult.progress_percent || 0).toFixed(0) + '%';
-                }
-            } catch (error) {
-                console.error('Stats update failed:', error);
-            }
-        }
-        
-        async function exportBookmarks() {
-            try {
-                const response = await fetch('/export_bookmarks');
-                const result = await response.json();
-                
-                const blob = new Blob([JSON.stringify(result, null, 2)], {type: 'application/json'});
-                const url = URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = `storage_facility_scan_${new Date().toISOString().split('T')[0]}.json`;
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-                URL.revokeObjectURL(url);
-                
-                alert('📁 Results exported successfully!');
-            } catch (error) {
-                alert('❌ Export failed: ' + error.message);
-            }
-        }
-        
-        async function clearBookmarks() {
-            if (confirm('Are you sure you want to clear all bookmarks? This cannot be undone.')) {
-                location.reload();
-            }
-        }
-        
-        // Auto-update bookmarks and stats every 5 seconds
-        setInterval(() => {
-            if (currentSession) {
-                updateBookmarks();
-                updateStats();
-            }
-        }, 5000);
-        
-        // Initialize on page load
-        document.addEventListener('DOMContentLoaded', function() {
-            document.getElementById('center-lat').focus();
-        });
-        
-        // Keyboard shortcuts
-        document.addEventListener('keydown', function(e) {
-            if (e.ctrlKey || e.metaKey) {
-                switch(e.key) {
-                    case 'ArrowLeft':
-                        e.preventDefault();
-                        previousLocation();
-                        break;
-                    case 'ArrowRight':
-                        e.preventDefault();
-                        nextLocation();
-                        break;
-                    case ' ':
-                        e.preventDefault();
-                        addBookmark();
-                        break;
-                }
-            }
-        });
-    </script>
-</body>
-</html>'''
-        f.write(template_content)
+    # Get port from environment variable (Railway sets this)
+    port = int(os.environ.get('PORT', 5000))
     
     print("🚀 Starting Self-Storage Facility Scanner...")
-    print("📍 Access the app at: http://localhost:5000")
+    print(f"📍 Access the app at: http://localhost:{port}")
     print("🌐 Ready for deployment!")
     
-    # Get port from environment variable (Railway sets this)
-    port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    # Debug (and its reloader, which runs this module twice) is opt-in via
+    # FLASK_DEBUG=1; threaded so /events and long polls don't block other requests
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=port, threaded=True)